@@ -6,26 +6,42 @@ A RAG-powered document Q&A system for MBA students.
 from __future__ import annotations
 
 import csv
+import functools
+import gc
+import hashlib
 import io
+import itertools
+import operator
 import os
-import random
 import re
-import string
+import shutil
+import sqlite3
+import tempfile
+import threading
 import time
+from array import array
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Annotated, Any, cast
+from typing import IO, TYPE_CHECKING, Annotated, Any, Literal, cast
 
 import fitz  # PyMuPDF
+import numpy as np
+import orjson
 import tiktoken
 from docx import Document
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pptx import Presentation
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 if TYPE_CHECKING:
-    from openai import OpenAI
+    import asyncio
+    from collections.abc import AsyncIterator
+
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
     from openai.types.chat import ChatCompletionMessageParam
     from pinecone import Index
 
@@ -33,7 +49,12 @@ if TYPE_CHECKING:
 # App
 # =============================================================================
 load_dotenv()
-app = FastAPI(title="MBA Copilot API", root_path="/backend")
+# Responses (chat sources, document lists) are encoded with orjson instead of json
+app = FastAPI(
+    title="MBA Copilot API",
+    root_path="/backend",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -51,27 +72,80 @@ app.add_middleware(
 class Config:
     """Configuration settings for the MBA Copilot application."""
 
+    # Settings are class attributes; no per-instance __dict__ to probe on each lookup
+    __slots__ = ()
+
     # OpenAI
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
     OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.openai.com/v1")
     EMBEDDING_MODEL = "text-embedding-3-large"
     CHAT_MODEL = "gpt-4o-mini"
-    EMBEDDING_DIMENSIONS = 1024
+    # Must match the Pinecone index. text-embedding-3 models can be truncated (e.g. 512)
+    # to halve upsert payloads and storage, but that needs a re-created index.
+    EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", "1024"))
+    EMBEDDING_MAX_CONCURRENCY = 16  # in-flight embedding requests per upload
+    EMBEDDING_BATCH_SIZE = 128  # texts per batched request (~100k tokens of chunks)
+    # Concurrent single-text (query) embeddings are coalesced into one request
+    EMBEDDING_MICROBATCH_MAX_SIZE = 64
+    EMBEDDING_MICROBATCH_MAX_WAIT_MS = 10
 
     # Pinecone
     PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY")
     PINECONE_INDEX = os.environ.get("PINECONE_INDEX", "mba-copilot")
+    # One record per document (id = document_id), kept apart from the chunk vectors
+    DOCUMENT_REGISTRY_NAMESPACE = "document-registry"
 
     # RAG Settings (token-based)
     # Larger chunks to keep more context together
     CHUNK_TOKENS_DOCS = 800
     CHUNK_OVERLAP_TOKENS_DOCS = 150
+    # Above this many characters, tokenize sentence batches across threads
+    PARALLEL_TOKENIZE_MIN_CHARS = 50_000
+    # After extracting PDFs with at least this many pages, run a gc pass
+    PDF_GC_MIN_PAGES = 200
+    # PDFs with at least this many pages are extracted in parallel worker processes
+    PDF_PARALLEL_MIN_PAGES = 40
 
     # Retrieval settings
     RETRIEVAL_TOP_K = 20  # Retrieve more candidates
     CONTEXT_MAX_CHUNKS = 8  # Pass more context to LLM
     MIN_SCORE = 0.25  # Lower threshold to be more inclusive
 
+    # Chunked uploads: parts downloaded at once by /upload-from-urls
+    DOWNLOAD_MAX_CONCURRENCY = 8
+    # Background upload outcomes stay queryable at /documents/{id}/status this long
+    UPLOAD_JOB_TTL_SECONDS = 3600
+
+    # Kept-alive HTTPS connections to the Pinecone index host
+    PINECONE_POOL_MAXSIZE = 30
+
+    # Embedding caches (~4 KB per 1024-dim entry)
+    EMBEDDING_CACHE_MAX_ENTRIES = 4096
+    QUERY_EMBEDDING_CACHE_MAX_ENTRIES = 4096
+    # On-disk chunk embedding cache (/tmp is the only writable path on Vercel)
+    EMBEDDING_DISK_CACHE_PATH = os.getenv(
+        "EMBEDDING_DISK_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "mba-copilot-embeddings.sqlite3"),
+    )
+    EMBEDDING_DISK_CACHE_MAX_ROWS = 25_000  # ~100 MB of 1024-dim vectors
+    # Wait this long for another writer's lock, then treat the lookup as a miss
+    EMBEDDING_DISK_CACHE_BUSY_TIMEOUT_SECONDS = 0.5
+
+    # Local retrieval cache in front of Pinecone (~4 KB per vector). Opt-in: it needs
+    # include_values on every Pinecone query, which makes a 20-match response ~475 KB
+    # and ~40 ms to deserialize (vs ~60 KB and ~1.5 ms), and a local hit can miss
+    # better chunks it has never seen.
+    LOCAL_VECTOR_CACHE_ENABLED = os.environ.get("LOCAL_VECTOR_CACHE_ENABLED", "").lower() == "true"
+    LOCAL_VECTOR_CACHE_MAX_VECTORS = 5000
+    LOCAL_VECTOR_CACHE_TTL_SECONDS = 300
+    LOCAL_VECTOR_CACHE_MARGIN = 0.15  # local hits must score >= MIN_SCORE + margin
+
+    # /chat retrieval cache: exact question match, then near-duplicate questions
+    # (~35 KB per entry: the top CONTEXT_MAX_CHUNKS matches with their chunk text)
+    QUERY_CACHE_MAX_ENTRIES = 500
+    QUERY_CACHE_TTL_SECONDS = 600
+    QUERY_CACHE_MIN_SIMILARITY = 0.95
+
 
 config = Config()
 
@@ -81,25 +155,71 @@ config = Config()
 
 _openai_client: OpenAI | None = None
 _pinecone_index: Index | None = None
+# Async clients' pools are bound to the event loop that opened them, so each client
+# is kept together with its loop and rebuilt if the runtime runs a new loop
+_async_openai_client: AsyncOpenAI | None = None
+_async_openai_loop: asyncio.AbstractEventLoop | None = None
+_download_client: httpx.AsyncClient | None = None
+_download_loop: asyncio.AbstractEventLoop | None = None
 
 
 def get_openai() -> OpenAI:
-    """Get or initialize the OpenAI client."""
+    """Get or initialize the OpenAI client.
+
+    Uses a pooled HTTP/2 connection so warm instances skip the TLS handshake.
+    """
     global _openai_client
     if _openai_client is None:
         if not config.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
+        import httpx
         from openai import OpenAI
 
         _openai_client = OpenAI(
             api_key=config.OPENAI_API_KEY,
             base_url=config.OPENAI_BASE_URL,
+            http_client=httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=30),
+            ),
         )
 
     return _openai_client
 
 
+def get_async_openai() -> AsyncOpenAI:
+    """Get or initialize the async OpenAI client.
+
+    Shared across requests so the connection pool (and its keep-alive TLS
+    connections) survives between embedding fan-outs; HTTP/2 lets a fan-out
+    share a few multiplexed connections. Rebuilt when called from a different
+    event loop than the one the pool belongs to.
+    """
+    import asyncio
+
+    global _async_openai_client, _async_openai_loop
+    loop = asyncio.get_running_loop()
+    if _async_openai_client is None or _async_openai_loop is not loop:
+        if not config.OPENAI_API_KEY:
+            raise RuntimeError("OPENAI_API_KEY is not set")
+
+        import httpx
+        from openai import AsyncOpenAI
+
+        _async_openai_client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            base_url=config.OPENAI_BASE_URL if config.OPENAI_BASE_URL else None,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            ),
+        )
+        _async_openai_loop = loop
+
+    return _async_openai_client
+
+
 def get_pinecone_index() -> Index:
     """Get or initialize the Pinecone index."""
     global _pinecone_index
@@ -110,24 +230,131 @@ def get_pinecone_index() -> Index:
         from pinecone import Pinecone
 
         pc = Pinecone(api_key=config.PINECONE_API_KEY)
+        # The urllib3 pool defaults to 5 connections per CPU; size it so concurrent
+        # queries and upserts each reuse a kept-alive connection
+        pc.openapi_config.connection_pool_maxsize = config.PINECONE_POOL_MAXSIZE
         _pinecone_index = pc.Index(config.PINECONE_INDEX)
 
     return _pinecone_index
 
 
+def get_download_client() -> httpx.AsyncClient:
+    """Get or initialize the shared HTTP/2 client for blob downloads.
+
+    Chunked uploads fetch many parts from the same blob origin; HTTP/2 multiplexes
+    them over one or two pooled connections instead of a TLS handshake per part.
+    Rebuilt when called from a different event loop than the pool belongs to.
+    """
+    import asyncio
+
+    global _download_client, _download_loop
+    loop = asyncio.get_running_loop()
+    if _download_client is None or _download_loop is not loop:
+        import httpx
+
+        _download_client = httpx.AsyncClient(
+            timeout=300.0,
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+        _download_loop = loop
+
+    return _download_client
+
+
+@app.on_event("shutdown")
+async def close_download_client() -> None:
+    """Close the shared download client's pooled connections."""
+    import asyncio
+
+    global _download_client, _download_loop
+    # A client from an earlier (closed) loop can't be closed from this one
+    if _download_client is not None and _download_loop is asyncio.get_running_loop():
+        await _download_client.aclose()
+    _download_client = None
+    _download_loop = None
+
+
 # =============================================================================
 # Token Utilities
 # =============================================================================
 
 
-def num_tokens(text: str, model: str | None = None) -> int:
-    """Count tokens in text using tiktoken."""
-    encoding_model = model or config.EMBEDDING_MODEL
+@functools.lru_cache(maxsize=8)
+def _get_encoder(model: str | None) -> tiktoken.Encoding:
+    """Get the (cached) tiktoken encoder for a model."""
     try:
-        enc = tiktoken.encoding_for_model(encoding_model)
+        return tiktoken.encoding_for_model(model or config.EMBEDDING_MODEL)
     except KeyError:
         # Fallback to cl100k_base for unknown models
-        enc = tiktoken.get_encoding("cl100k_base")
+        return tiktoken.get_encoding("cl100k_base")
+
+
+# Warm the default encoder at import so the first upload doesn't pay for loading
+# the BPE vocab. Best-effort: tiktoken may need network access to fetch it.
+try:
+    _get_encoder(None).encode("warmup")
+except Exception:
+    pass
+
+
+# Split points between sentences/paragraphs; whitespace stays with the next piece so
+# each piece tokenizes the same way it would inside the full text.
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])(?=\s)|(?<=\n)(?=\S)")
+
+
+def _encode_segments(enc: tiktoken.Encoding, pieces: list[str], n_chars: int) -> list[list[int]]:
+    """Tokenize text segments, spreading large documents across threads.
+
+    tiktoken releases the GIL while encoding, so each thread encodes one contiguous
+    range of pieces. One task per range (not per piece, as encode_ordinary_batch
+    does) keeps the executor's per-task overhead off the GIL.
+    """
+    workers = min(os.cpu_count() or 1, len(pieces))
+    if n_chars < config.PARALLEL_TOKENIZE_MIN_CHARS or workers < 2:
+        return [enc.encode_ordinary(piece) for piece in pieces]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    bounds = [len(pieces) * i // workers for i in range(workers + 1)]
+
+    def encode_range(start: int, stop: int) -> list[list[int]]:
+        return [enc.encode_ordinary(piece) for piece in pieces[start:stop]]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        shards = pool.map(encode_range, bounds[:-1], bounds[1:])
+        return [tokens for shard in shards for tokens in shard]
+
+
+def _token_spans(enc: tiktoken.Encoding, text: str, max_tokens: int) -> tuple[list[int], list[int]]:
+    """Split text into sentence/paragraph spans and count the tokens in each.
+
+    Returns (char_lengths, token_counts). The spans concatenate back to exactly
+    ``text``. A segment longer than max_tokens is split further at token boundaries,
+    which only happens for runs of text with no sentence or line breaks.
+    """
+    pieces = _SENTENCE_BOUNDARY_RE.split(text)
+    # encode_ordinary skips the special-token scan (and won't choke on "<|endoftext|>")
+    encoded = _encode_segments(enc, pieces, len(text))
+
+    lengths: list[int] = []
+    counts: list[int] = []
+    for piece, tokens in zip(pieces, encoded, strict=True):
+        if len(tokens) <= max_tokens:
+            lengths.append(len(piece))
+            counts.append(len(tokens))
+            continue
+        # Per-token char offsets for the oversized segment; each token becomes a span
+        _, offsets = enc.decode_with_offsets(tokens)
+        bounds = [*offsets, len(piece)]
+        lengths.extend(b - a for a, b in itertools.pairwise(bounds))
+        counts.extend(itertools.repeat(1, len(offsets)))
+    return lengths, counts
+
+
+def num_tokens(text: str, model: str | None = None) -> int:
+    """Count tokens in text using tiktoken."""
+    enc = _get_encoder(model)
     return len(enc.encode(text))
 
 
@@ -137,7 +364,13 @@ def chunk_by_tokens(
     overlap_tokens: int,
     model: str | None = None,
 ) -> list[str]:
-    """Split text into chunks by token count (not characters)."""
+    """Split text into chunks by token count (not characters).
+
+    Chunks end on sentence or paragraph boundaries and are sliced straight out of
+    the source text, so nothing is decoded back from tokens. Consecutive chunks
+    share up to overlap_tokens of whole spans, and no chunk encodes to more than
+    chunk_tokens tokens (unless a single character already does).
+    """
     text = text.replace("\r\n", "\n").strip()
     if not text:
         return []
@@ -145,32 +378,38 @@ def chunk_by_tokens(
     if overlap_tokens >= chunk_tokens:
         raise ValueError("overlap_tokens must be < chunk_tokens")
 
-    encoding_model = model or config.EMBEDDING_MODEL
-    try:
-        enc = tiktoken.encoding_for_model(encoding_model)
-    except KeyError:
-        enc = tiktoken.get_encoding("cl100k_base")
-
-    tokens = enc.encode(text)
-
-    # If text fits in one chunk, return as-is
-    if len(tokens) <= chunk_tokens:
-        return [text]
+    enc = _get_encoder(model)
+    lengths, counts = _token_spans(enc, text, chunk_tokens)
 
+    char_starts = [0, *itertools.accumulate(lengths)]
+    n = len(counts)
     chunks: list[str] = []
-    start = 0
-
-    while start < len(tokens):
-        end = min(start + chunk_tokens, len(tokens))
-        chunk_text = enc.decode(tokens[start:end]).strip()
-        if chunk_text:
-            chunks.append(chunk_text)
-
-        if end >= len(tokens):
+    i = 0
+    while i < n:
+        # Take whole spans up to chunk_tokens (always at least one)
+        j, used = i + 1, counts[i]
+        while j < n and used + counts[j] <= chunk_tokens:
+            used += counts[j]
+            j += 1
+
+        # Span counts are per segment; the joined slice can encode to a few more tokens
+        # (BPE merges across spans, a multi-byte character split between spans), so
+        # check the real count and give back spans until it fits
+        chunk = text[char_starts[i] : char_starts[j]].strip()
+        while j - 1 > i and len(enc.encode_ordinary(chunk)) > chunk_tokens:
+            j -= 1
+            chunk = text[char_starts[i] : char_starts[j]].strip()
+        if chunk:
+            chunks.append(chunk)
+        if j >= n:
             break
 
-        # Move start forward, accounting for overlap
-        start = max(0, end - overlap_tokens)
+        # Start the next chunk up to overlap_tokens back, but always past i
+        k, back = j, 0
+        while k - 1 > i and back + counts[k - 1] <= overlap_tokens:
+            k -= 1
+            back += counts[k]
+        i = k
 
     return chunks
 
@@ -180,45 +419,112 @@ def chunk_by_tokens(
 # =============================================================================
 
 
-def _extract_pdf_text_best_fidelity(content: bytes) -> str:
-    """Extract text from PDF with best fidelity using block coordinates.
+def _open_pdf(source: bytes | str) -> Any:
+    """Open a PDF from bytes or from a file path (which MuPDF reads lazily)."""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
 
-    - get_text("blocks") -> includes bounding boxes
-    - sort blocks by y then x with a small y tolerance to keep lines aligned
-    - preserve page boundaries
+
+_BLOCK_XY = operator.itemgetter(0, 1)  # (x0, y0) of a MuPDF text block
+
+
+def _pdf_page_text(page: Any) -> str:
+    """Extract a PDF page's text in reading order."""
+    y_tol_inv = 1.0 / 3.0  # y tolerance of 3 points
+
+    # sort=True has MuPDF order the blocks by y then x natively. Blocks are
+    # (x0, y0, x1, y1, "text", block_no, block_type) tuples.
+    blocks: Any = page.get_text("blocks", sort=True)
+
+    # Text blocks are always 7-tuples with a str at [4]; image blocks aren't requested
+    kept = [b for b in blocks if b[4].strip()]
+    if not kept:
+        return ""
+
+    # MuPDF compares exact y; re-bucket with a small y tolerance so blocks on the same
+    # visual line stay left-to-right. The (bucket, x) ordering is a stable numpy
+    # lexsort over parallel arrays, so no Python comparisons are involved.
+    # map() with a C itemgetter gathers (x0, y0) without a Python frame per block
+    coords = np.array(list(map(_BLOCK_XY, kept)), dtype=np.float64)
+    buckets = np.round(coords[:, 1] * y_tol_inv).astype(np.int32)
+    order = np.lexsort((coords[:, 0], buckets))
+
+    return "\n".join(kept[i][4].rstrip() for i in order).strip()
+
+
+def _extract_pdf_page_range(source: bytes | str, start: int, stop: int) -> list[str]:
+    """Extract the text of pages [start, stop); runs in a worker process."""
+    doc = _open_pdf(source)
+    try:
+        return [_pdf_page_text(doc.load_page(i)) for i in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _extract_pdf_pages_parallel(source: bytes | str, page_count: int) -> list[str] | None:
+    """Extract page texts with one worker process per shard of pages.
+
+    Each worker re-opens the PDF from the same bytes or path. Returns None when worker
+    processes are unavailable (e.g. no /dev/shm on AWS Lambda).
     """
-    doc = fitz.open(stream=content, filetype="pdf")
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(os.cpu_count() or 1, page_count)
+    bounds = [page_count * i // workers for i in range(workers + 1)]
+
     try:
-        pages_out: list[str] = []
-        y_tol = 3.0  # points
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = pool.map(
+                _extract_pdf_page_range,
+                [source] * workers,
+                bounds[:-1],
+                bounds[1:],
+            )
+            return [text for shard in shards for text in shard]
+    except (OSError, NotImplementedError) as e:
+        print(f"[pdf] Parallel extraction unavailable, falling back to serial: {e}")
+        return None
 
-        for page in doc:
-            blocks: Any = page.get_text("blocks")
-            clean_blocks: list[Any] = []
 
-            for b in blocks:
-                if (
-                    isinstance(b, (tuple, list))
-                    and len(b) >= 5
-                    and isinstance(b[4], str)
-                    and b[4].strip()
-                ):
-                    clean_blocks.append(b)
+def _extract_pdf_text_best_fidelity(source: bytes | str) -> str:
+    """Extract text from PDF with best fidelity using block coordinates.
 
-            clean_blocks.sort(key=lambda b: (round(float(b[1]) / y_tol), float(b[0])))
+    - get_text("blocks", sort=True) -> includes bounding boxes, pre-sorted by MuPDF
+    - sort blocks by y then x with a small y tolerance to keep lines aligned
+    - long PDFs are split into page ranges extracted in parallel processes
+    - preserve page boundaries
+    - very large PDFs trigger a gc pass afterwards (PyMuPDF page objects leak otherwise)
+    - MuPDF's store is emptied afterwards; the context itself is reused
 
-            page_text = "\n".join(str(b[4]).rstrip() for b in clean_blocks).strip()
-            if page_text:
-                pages_out.append(page_text)
+    source is the PDF's bytes or a path to it.
+    """
+    doc = _open_pdf(source)
+    page_count = 0
+    try:
+        page_count = doc.page_count
 
-        return "\n\n".join(pages_out).strip()
+        page_texts: list[str] | None = None
+        if page_count >= config.PDF_PARALLEL_MIN_PAGES and (os.cpu_count() or 1) > 1:
+            page_texts = _extract_pdf_pages_parallel(source, page_count)
+        if page_texts is None:
+            page_texts = [_pdf_page_text(page) for page in doc]
+
+        return "\n\n".join(t for t in page_texts if t).strip()
     finally:
         doc.close()
+        # The MuPDF context lives as long as the process; empty its resource store
+        # and accumulated warnings so a warm instance doesn't carry them between docs
+        fitz.TOOLS.store_shrink(100)
+        fitz.TOOLS.reset_mupdf_warnings()
+        if page_count >= config.PDF_GC_MIN_PAGES:
+            # Reclaim page/textpage wrappers (and their MuPDF memory) before embedding
+            gc.collect()
 
 
-def _extract_docx_text(content: bytes) -> str:
+def _extract_docx_text(fileobj: IO) -> str:
     """Extract text from DOCX file."""
-    doc = Document(io.BytesIO(content))
+    doc = Document(fileobj)
     parts: list[str] = []
 
     for para in doc.paragraphs:
@@ -235,41 +541,43 @@ def _extract_docx_text(content: bytes) -> str:
     return "\n".join(parts).strip()
 
 
-def _extract_pptx_text(content: bytes) -> str:
-    """Extract text from PPTX file."""
-    prs = Presentation(io.BytesIO(content))
-    slides_out: list[str] = []
+def _extract_one_slide(slide: Any, si: int) -> str:
+    """Extract the text, tables and speaker notes of one PPTX slide."""
+    parts: list[str] = [f"--- Slide {si} ---"]
 
-    for si, slide in enumerate(prs.slides, start=1):
-        parts: list[str] = [f"--- Slide {si} ---"]
+    for shape in slide.shapes:
+        # python-pptx is dynamic; stubs are conservative.
+        s = cast(Any, shape)
 
-        for shape in slide.shapes:
-            # python-pptx is dynamic; stubs are conservative.
-            s = cast(Any, shape)
+        if hasattr(s, "text_frame") and s.text_frame:
+            txt = (s.text_frame.text or "").strip()
+            if txt:
+                parts.append(txt)
 
-            if hasattr(s, "text_frame") and s.text_frame:
-                txt = (s.text_frame.text or "").strip()
-                if txt:
-                    parts.append(txt)
+        if hasattr(s, "table") and s.table:
+            for row in s.table.rows:
+                line = "\t".join(cell.text.strip() for cell in row.cells).rstrip()
+                if line.strip():
+                    parts.append(line)
 
-            if hasattr(s, "table") and s.table:
-                for row in s.table.rows:
-                    line = "\t".join(cell.text.strip() for cell in row.cells).rstrip()
-                    if line.strip():
-                        parts.append(line)
+    # Speaker notes. Check has_notes_slide first: notes_slide would otherwise create an
+    # empty notes part for every slide that has no notes.
+    try:
+        notes_slide = slide.notes_slide if slide.has_notes_slide else None
+        if notes_slide and notes_slide.notes_text_frame:
+            notes_txt = (notes_slide.notes_text_frame.text or "").strip()
+            if notes_txt:
+                parts.append("[Notes]\n" + notes_txt)
+    except Exception:
+        pass
 
-        # Speaker notes
-        try:
-            notes_slide = slide.notes_slide
-            if notes_slide and notes_slide.notes_text_frame:
-                notes_txt = (notes_slide.notes_text_frame.text or "").strip()
-                if notes_txt:
-                    parts.append("[Notes]\n" + notes_txt)
-        except Exception:
-            pass
+    return "\n".join(parts).strip()
 
-        slides_out.append("\n".join(parts).strip())
 
+def _extract_pptx_text(fileobj: IO) -> str:
+    """Extract text from PPTX file."""
+    prs = Presentation(fileobj)
+    slides_out = [_extract_one_slide(slide, si) for si, slide in enumerate(prs.slides, start=1)]
     return "\n\n".join(s for s in slides_out if s).strip()
 
 
@@ -279,12 +587,20 @@ def _extract_csv_structured(content: bytes) -> list[dict[str, Any]]:
     Each row becomes a chunk formatted as: "ColA: valA | ColB: valB | ..."
     """
     text = content.decode("utf-8-sig", errors="replace")
-    reader = csv.DictReader(io.StringIO(text))
+    reader = csv.reader(io.StringIO(text))
+
+    header = next(reader, None)
+    if not header:
+        return []
+    # Build the "ColA: " prefixes once instead of a dict + f-string per cell
+    prefixes = [f"{k}: " for k in header]
 
     rows: list[dict[str, Any]] = []
-    for idx, row in enumerate(reader, start=1):
+    # Blank lines are skipped (and not counted), as csv.DictReader does
+    for idx, row in enumerate((r for r in reader if r), start=1):
         # Format: "ColA: valA | ColB: valB"
-        chunk_text = " | ".join(f"{k}: {v}" for k, v in row.items() if v and v.strip())
+        cells = zip(prefixes, row, strict=False)
+        chunk_text = " | ".join([p + v for p, v in cells if v and v.strip()])
         if chunk_text.strip():
             rows.append({
                 "row_number": idx,
@@ -294,32 +610,17 @@ def _extract_csv_structured(content: bytes) -> list[dict[str, Any]]:
     return rows
 
 
-def _extract_pdf_with_pages(content: bytes) -> list[dict[str, Any]]:
+def _extract_pdf_with_pages(source: bytes | str) -> list[dict[str, Any]]:
     """Extract PDF with page-level metadata.
 
     Returns list of dicts with: page_number, text
     """
-    doc = fitz.open(stream=content, filetype="pdf")
+    doc = _open_pdf(source)
     try:
         pages: list[dict[str, Any]] = []
-        y_tol = 3.0  # points
 
         for page_num, page in enumerate(doc, start=1):
-            blocks: Any = page.get_text("blocks")
-            clean_blocks: list[Any] = []
-
-            for b in blocks:
-                if (
-                    isinstance(b, (tuple, list))
-                    and len(b) >= 5
-                    and isinstance(b[4], str)
-                    and b[4].strip()
-                ):
-                    clean_blocks.append(b)
-
-            clean_blocks.sort(key=lambda b: (round(float(b[1]) / y_tol), float(b[0])))
-
-            page_text = "\n".join(str(b[4]).rstrip() for b in clean_blocks).strip()
+            page_text = _pdf_page_text(page)
             if page_text:
                 pages.append({
                     "page_number": page_num,
@@ -331,18 +632,25 @@ def _extract_pdf_with_pages(content: bytes) -> list[dict[str, Any]]:
         doc.close()
 
 
+def _read_text(fileobj: IO[bytes]) -> str:
+    """Decode a text upload in one streaming pass, without an intermediate bytes copy."""
+    wrapper = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace")
+    try:
+        return wrapper.read()
+    finally:
+        # Detach so closing the wrapper doesn't close the upload's file
+        wrapper.detach()
+
+
 def extract_structured_chunks(file: UploadFile) -> list[dict[str, Any]]:
     """Extract file into structured chunks with metadata.
 
     Simple token-based chunking for all file types.
     Returns list of dicts with 'text' and 'chunk_index'.
-    """
-    content = file.file.read()
-    try:
-        file.file.seek(0)
-    except Exception:
-        pass
 
+    The upload is never read into memory as a whole up front: DOCX/PPTX are
+    parsed straight from the file object, and PDFs are opened by path.
+    """
     if not isinstance(file.filename, str) or not file.filename:
         raise ValueError("Uploaded file has no filename")
 
@@ -350,7 +658,7 @@ def extract_structured_chunks(file: UploadFile) -> list[dict[str, Any]]:
 
     # Extract text based on file type
     if filename.endswith(".pptx"):
-        text = _extract_pptx_text(content)
+        text = _extract_pptx_text(file.file)
     elif filename.endswith(".csv"):
         # For CSV, just treat as plain text for now
         # TODO: Revisit row-based chunking with batching when we have more time
@@ -396,13 +704,22 @@ def extract_structured_chunks(file: UploadFile) -> list[dict[str, Any]]:
         #
         # return [{"text": chunk, "chunk_index": i} for i, chunk in enumerate(chunks)]
 
-        text = content.decode("utf-8-sig", errors="replace")
+        text = _read_text(file.file)
     elif filename.endswith(".pdf"):
-        text = _extract_pdf_text_best_fidelity(content)
+        # MuPDF reads a PDF on disk lazily (and worker processes reopen it by path), so
+        # named temp files (URL downloads) are used as-is and other uploads are spooled
+        path = getattr(file.file, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            text = _extract_pdf_text_best_fidelity(path)
+        else:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+                shutil.copyfileobj(file.file, tmp, 1024 * 1024)
+                tmp.flush()
+                text = _extract_pdf_text_best_fidelity(tmp.name)
     elif filename.endswith(".docx"):
-        text = _extract_docx_text(content)
+        text = _extract_docx_text(file.file)
     elif filename.endswith((".txt", ".md")):
-        text = content.decode("utf-8-sig", errors="replace")
+        text = _read_text(file.file)
     else:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {filename}")
 
@@ -419,9 +736,19 @@ def extract_structured_chunks(file: UploadFile) -> list[dict[str, Any]]:
     return [{"text": chunk, "chunk_index": i} for i, chunk in enumerate(text_chunks)]
 
 
+_CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
 def generate_document_id() -> str:
-    """Generate a unique document ID."""
-    return f"doc_{int(time.time())}_{''.join(random.choices(string.ascii_lowercase, k=6))}"
+    """Generate a unique document ID: "doc_" plus a ULID.
+
+    A ULID is a 48-bit millisecond timestamp followed by 80 random bits, written as
+    26 Crockford base32 characters, so IDs sort by creation time.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    return "doc_" + "".join(
+        _CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5)
+    )
 
 
 # =============================================================================
@@ -429,49 +756,596 @@ def generate_document_id() -> str:
 # =============================================================================
 
 
-def generate_embedding(text: str) -> list[float]:
-    """Generate embedding for a single text string."""
-    client = get_openai()
-    response = client.embeddings.create(
-        model=config.EMBEDDING_MODEL, input=text, dimensions=config.EMBEDDING_DIMENSIONS
-    )
-    return response.data[0].embedding
+class EmbeddingCache:
+    """In-process LRU cache of embeddings keyed by content hash.
 
+    Keys are the SHA-256 of the embedding model, dimensions and text, so a change
+    to either setting never serves a stale vector. Values are stored as float32
+    arrays (what the API returns) to keep entries at ~4 KB.
+    """
 
-async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
-    """Generate embeddings for multiple texts using parallel individual requests.
+    def __init__(self, max_entries: int) -> None:
+        """Create an empty cache holding at most max_entries embeddings."""
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, array[float]] = OrderedDict()
+
+    @staticmethod
+    def key(text: str) -> str:
+        """Content hash identifying text under the current embedding settings."""
+        raw = f"{config.EMBEDDING_MODEL}\0{config.EMBEDDING_DIMENSIONS}\0{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> list[float] | None:
+        """Return the cached embedding for text, if any."""
+        key = self.key(text)
+        vec = self._entries.get(key)
+        if vec is None:
+            return None
+        self._entries.move_to_end(key)
+        return vec.tolist()
+
+    def put(self, text: str, embedding: list[float]) -> None:
+        """Store an embedding, evicting the least recently used entries if full."""
+        key = self.key(text)
+        self._entries[key] = array("f", embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class DiskEmbeddingCache:
+    """SQLite-backed embedding cache, so re-uploaded chunks aren't embedded again.
+
+    Rows are keyed like EmbeddingCache (hash of model, dimensions and text) and
+    hold raw float32 bytes. The oldest rows are dropped past max_rows. A database
+    that is busy (locked by another writer for longer than busy_timeout) counts as
+    a miss; any other SQLite error disables the cache for the rest of the process
+    instead of failing uploads. Calls block, so run them off the event loop.
+    """
 
-    Note: CBS endpoint blocks batch requests via Cloudflare, so we send
-    individual requests in parallel instead.
+    def __init__(self, path: str, max_rows: int, busy_timeout: float) -> None:
+        """Create a cache backed by the SQLite file at path (opened on first use)."""
+        self.path = path
+        self.max_rows = max_rows
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is None and not self._disabled:
+            conn: sqlite3.Connection | None = None
+            try:
+                conn = sqlite3.connect(
+                    self.path, timeout=self.busy_timeout, check_same_thread=False
+                )
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+                )
+                self._conn = conn
+            except sqlite3.Error as e:
+                if conn is not None:
+                    conn.close()
+                self._on_error("unavailable", e)
+        return self._conn
+
+    def _on_error(self, action: str, error: sqlite3.Error) -> None:
+        # Called with self._lock held (or before first use)
+        # Another process holding the write lock is transient (extended codes share
+        # the primary code's low byte)
+        code = (error.sqlite_errorcode or 0) & 0xFF
+        if code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+            print(f"[embeddings] Disk cache busy, skipping: {error}")
+            return
+
+        print(f"[embeddings] Disk cache {action}, disabling it: {error}")
+        self._disabled = True
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Return the cached embeddings for whichever keys are present."""
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not keys:
+                return found
+            try:
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    batch = keys[i : i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT key, vec FROM embeddings WHERE key IN ({placeholders})", batch
+                    )
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            except sqlite3.Error as e:
+                self._on_error("read failed", e)
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        """Store embeddings, dropping the oldest rows beyond max_rows."""
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not items:
+                return
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                        [
+                            (key, np.asarray(vec, dtype=np.float32).tobytes())
+                            for key, vec in items.items()
+                        ],
+                    )
+                    conn.execute(
+                        "DELETE FROM embeddings WHERE rowid <= "
+                        "(SELECT MAX(rowid) FROM embeddings) - ?",
+                        (self.max_rows,),
+                    )
+            except sqlite3.Error as e:
+                self._on_error("write failed", e)
+
+
+embedding_cache = EmbeddingCache(config.EMBEDDING_CACHE_MAX_ENTRIES)
+disk_embedding_cache = DiskEmbeddingCache(
+    config.EMBEDDING_DISK_CACHE_PATH,
+    config.EMBEDDING_DISK_CACHE_MAX_ROWS,
+    config.EMBEDDING_DISK_CACHE_BUSY_TIMEOUT_SECONDS,
+)
+# Kept separate so large uploads can't evict frequently asked questions
+query_embedding_cache = EmbeddingCache(config.QUERY_EMBEDDING_CACHE_MAX_ENTRIES)
 
-    TODO: Revert to batch API when CBS IT enables batch embedding requests.
-    Original implementation:
-        client = get_openai()
-        response = client.embeddings.create(
-            model=config.EMBEDDING_MODEL, input=texts, dimensions=config.EMBEDDING_DIMENSIONS
-        )
-        return [d.embedding for d in response.data]
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embedding calls into one API request.
+
+    The first submit starts a max_wait_ms timer; everything submitted before it
+    fires (or until max_batch_size texts are waiting) goes out as one request and
+    each caller gets its own vector back. No long-lived worker task is kept, so
+    nothing is tied to an event loop that a serverless runtime may replace.
     """
-    import asyncio
 
-    from openai import AsyncOpenAI
+    def __init__(self, max_batch_size: int, max_wait_ms: float) -> None:
+        """Create a batcher with nothing pending."""
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[str, asyncio.Future[list[float]]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()  # strong refs until done
 
-    # Create async client with same config as sync client
-    async_client = AsyncOpenAI(
-        api_key=config.OPENAI_API_KEY,
-        base_url=config.OPENAI_BASE_URL if config.OPENAI_BASE_URL else None,
-    )
+    async def submit(self, text: str) -> list[float]:
+        """Embed text as part of the next batch."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[float]] = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        import asyncio
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._embed(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed(self, batch: list[tuple[str, asyncio.Future[list[float]]]]) -> None:
+        # Every caller's future must be resolved, whatever fails in here
+        error: BaseException = RuntimeError("Embedding batch ended without a result")
+        try:
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            by_text = dict(zip(texts, await self._embed_texts(texts), strict=True))
+            for text, future in batch:
+                result = by_text[text]
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            error = e
+        finally:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _embed_texts(self, texts: list[str]) -> list[list[float] | BaseException]:
+        """Embed texts, returning each one's vector or the error that text hit."""
+        import asyncio
+
+        async_client = get_async_openai()
+
+        if _supports_batch_embeddings() and len(texts) > 1:
+            try:
+                response = await async_client.embeddings.create(
+                    model=config.EMBEDDING_MODEL,
+                    input=texts,
+                    dimensions=config.EMBEDDING_DIMENSIONS,
+                )
+                return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+            except Exception as e:
+                # One over-long or invalid text fails the whole request; retry each
+                # text on its own so the other callers still get their vectors
+                print(f"Batched query embedding failed, retrying per text: {e}")
+
+        async def embed_one(text: str) -> list[float]:
+            response = await async_client.embeddings.create(
+                model=config.EMBEDDING_MODEL,
+                input=text,
+                dimensions=config.EMBEDDING_DIMENSIONS,
+            )
+            return response.data[0].embedding
+
+        # Per-text requests (CBS blocks list inputs), sent side by side
+        return await asyncio.gather(*[embed_one(text) for text in texts], return_exceptions=True)
+
+
+embedding_batcher = EmbeddingBatcher(
+    max_batch_size=config.EMBEDDING_MICROBATCH_MAX_SIZE,
+    max_wait_ms=config.EMBEDDING_MICROBATCH_MAX_WAIT_MS,
+)
+
+
+async def generate_embedding(text: str) -> list[float]:
+    """Generate embedding for a single text string.
+
+    Repeated questions are served from query_embedding_cache without an API call;
+    the rest go through embedding_batcher alongside concurrent requests.
+    """
+    cached = query_embedding_cache.get(text)
+    if cached is not None:
+        return cached
+
+    embedding = await embedding_batcher.submit(text)
+    query_embedding_cache.put(text, embedding)
+    return embedding
+
+
+def _supports_batch_embeddings() -> bool:
+    """Whether the configured endpoint accepts a list of inputs per embeddings request.
+
+    The CBS endpoint blocks batch requests via Cloudflare; stock OpenAI doesn't.
+    """
+    from urllib.parse import urlparse
+
+    return urlparse(config.OPENAI_BASE_URL or "").hostname == "api.openai.com"
+
+
+async def generate_embeddings_batch(texts: list[str]) -> np.ndarray:
+    """Generate embeddings for multiple texts.
+
+    Against stock OpenAI, texts are sent in batches of EMBEDDING_BATCH_SIZE.
+    Other endpoints (CBS blocks batch requests via Cloudflare) get individual
+    requests in parallel instead. Either way at most EMBEDDING_MAX_CONCURRENCY
+    requests are in flight, to stay clear of rate limits.
+
+    Returns a (len(texts), dimensions) float32 array, a quarter of the memory of
+    nested Python float lists; rows are only converted to lists for the upsert.
+
+    TODO: Use the batch API for CBS too when CBS IT enables batch embedding requests.
+    """
+    import asyncio
+
+    async_client = get_async_openai()
+    semaphore = asyncio.Semaphore(config.EMBEDDING_MAX_CONCURRENCY)
 
     async def get_single_embedding(text: str) -> list[float]:
         """Get embedding for a single text."""
-        response = await async_client.embeddings.create(
-            model=config.EMBEDDING_MODEL, input=text, dimensions=config.EMBEDDING_DIMENSIONS
-        )
+        async with semaphore:
+            response = await async_client.embeddings.create(
+                model=config.EMBEDDING_MODEL, input=text, dimensions=config.EMBEDDING_DIMENSIONS
+            )
         return response.data[0].embedding
 
-    # Run all requests in parallel
-    embeddings = await asyncio.gather(*[get_single_embedding(text) for text in texts])
-    return list(embeddings)
+    async def get_batch_embeddings(batch: list[str]) -> list[list[float]]:
+        """Get embeddings for several texts in one request."""
+        async with semaphore:
+            response = await async_client.embeddings.create(
+                model=config.EMBEDDING_MODEL, input=batch, dimensions=config.EMBEDDING_DIMENSIONS
+            )
+        return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+    # Only embed texts we haven't seen before (re-uploads, repeated boilerplate)
+    embeddings = [embedding_cache.get(text) for text in texts]
+    misses = list(dict.fromkeys(t for t, e in zip(texts, embeddings, strict=True) if e is None))
+
+    # Then the on-disk cache, which holds far more than the in-memory LRU
+    keys = {text: EmbeddingCache.key(text) for text in misses}
+    on_disk = await asyncio.to_thread(disk_embedding_cache.get_many, list(keys.values()))
+    if on_disk:
+        from_disk = {t: on_disk[k] for t, k in keys.items() if k in on_disk}
+        for text, embedding in from_disk.items():
+            embedding_cache.put(text, embedding)
+        embeddings = [
+            e if e is not None else from_disk.get(t) for t, e in zip(texts, embeddings, strict=True)
+        ]
+        misses = [t for t in misses if t not in from_disk]
+
+    if misses:
+        fresh: list[list[float]]
+        if _supports_batch_embeddings():
+            size = config.EMBEDDING_BATCH_SIZE
+            batches = await asyncio.gather(
+                *[get_batch_embeddings(misses[i : i + size]) for i in range(0, len(misses), size)]
+            )
+            fresh = [embedding for batch in batches for embedding in batch]
+        else:
+            # Run all requests in parallel (bounded by the semaphore)
+            fresh = await asyncio.gather(*[get_single_embedding(text) for text in misses])
+        by_text = dict(zip(misses, fresh, strict=True))
+        for text, embedding in by_text.items():
+            embedding_cache.put(text, embedding)
+        await asyncio.to_thread(
+            disk_embedding_cache.put_many, {keys[t]: e for t, e in by_text.items()}
+        )
+        embeddings = [
+            e if e is not None else by_text[t] for t, e in zip(texts, embeddings, strict=True)
+        ]
+
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+# =============================================================================
+# Local Retrieval Cache
+# =============================================================================
+
+
+class LocalVectorCache:
+    """Per-process cache of chunks recently returned by Pinecone (QVCache-style).
+
+    Every Pinecone match is kept with its vector. A query is answered locally
+    with a brute-force cosine scan when its top_k local matches all score at
+    least MIN_SCORE + margin; otherwise it falls through to Pinecone. Entries
+    expire after ttl_seconds so changes made by other instances are picked up.
+    """
+
+    def __init__(self, max_vectors: int, ttl_seconds: float, margin: float) -> None:
+        """Create an empty cache."""
+        self.max_vectors = max_vectors
+        self.ttl_seconds = ttl_seconds
+        self.margin = margin
+        # id -> (unit vector, match dict, time added)
+        self._entries: OrderedDict[str, tuple[np.ndarray, dict[str, Any], float]] = OrderedDict()
+        self._matrix: np.ndarray | None = None  # stacked vectors, rebuilt lazily
+
+    def add(self, matches: list[dict[str, Any]], vectors: list[list[float]]) -> None:
+        """Remember Pinecone matches along with their vectors."""
+        now = time.monotonic()
+        for match, values in zip(matches, vectors, strict=True):
+            vec = np.asarray(values, dtype=np.float32)
+            norm = float(np.linalg.norm(vec))
+            if norm == 0.0:
+                continue
+            self._entries[match["id"]] = (vec / norm, match, now)
+            self._entries.move_to_end(match["id"])
+        while len(self._entries) > self.max_vectors:
+            self._entries.popitem(last=False)
+        self._matrix = None
+
+    def search(
+        self,
+        embedding: list[float],
+        top_k: int,
+        document_ids: list[str] | None = None,
+    ) -> list[dict[str, Any]] | None:
+        """Return the local top_k matches, or None if Pinecone should be queried."""
+        self._expire()
+        if len(self._entries) < top_k:
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return None
+
+        if self._matrix is None:
+            self._matrix = np.stack([vec for vec, _, _ in self._entries.values()])
+        matches = [match for _, match, _ in self._entries.values()]
+        scores = self._matrix @ (query / norm)
+
+        if document_ids:
+            allowed = set(document_ids)
+            mask = np.fromiter(
+                (m["document_id"] in allowed for m in matches), dtype=bool, count=len(matches)
+            )
+            if int(mask.sum()) < top_k:
+                return None
+            scores = np.where(mask, scores, -np.inf)
+
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+        if scores[top[-1]] < config.MIN_SCORE + self.margin:
+            return None
+
+        return [{**matches[i], "score": float(scores[i])} for i in top]
+
+    def forget_document(self, document_id: str) -> None:
+        """Drop all cached chunks of a document."""
+        stale = [k for k, (_, m, _) in self._entries.items() if m["document_id"] == document_id]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._matrix = None
+
+    def clear(self) -> None:
+        """Drop everything (e.g. after new chunks were stored)."""
+        self._entries.clear()
+        self._matrix = None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = False
+        # Entries are kept in insertion/refresh order, so the oldest are first
+        while self._entries:
+            key, (_, _, added_at) = next(iter(self._entries.items()))
+            if added_at >= cutoff:
+                break
+            del self._entries[key]
+            expired = True
+        if expired:
+            self._matrix = None
+
+
+local_vector_cache = LocalVectorCache(
+    max_vectors=config.LOCAL_VECTOR_CACHE_MAX_VECTORS,
+    ttl_seconds=config.LOCAL_VECTOR_CACHE_TTL_SECONDS,
+    margin=config.LOCAL_VECTOR_CACHE_MARGIN,
+)
+
+
+class QueryCache:
+    """Per-process cache of /chat retrieval results, keyed by question.
+
+    The exact tier matches the normalized question text and skips both the
+    embedding call and the Pinecone query. The semantic tier compares a new
+    question's embedding with every cached one in a single matrix product and
+    reuses the matches of a near-duplicate (cosine >= min_similarity). Both tiers
+    only match within the same document_ids filter. Only the matches that can
+    reach the LLM context are kept. Answers are not cached, since they also
+    depend on chat history and settings.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, min_similarity: float) -> None:
+        """Create an empty cache."""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self._lock = threading.RLock()
+        # key -> (unit embedding, scope, matches, time added)
+        self._entries: OrderedDict[str, tuple[np.ndarray, str, list[dict[str, Any]], float]] = (
+            OrderedDict()
+        )
+        # Stacked embeddings (rows in _matrix_keys order), rebuilt lazily. Hits only
+        # reorder _entries, so they don't invalidate it.
+        self._matrix: np.ndarray | None = None
+        self._matrix_keys: list[str] = []
+
+    @staticmethod
+    def _scope(document_ids: list[str] | None) -> str:
+        return ",".join(sorted(document_ids or []))
+
+    @classmethod
+    def key(cls, question: str, document_ids: list[str] | None) -> str:
+        """Cache key: document filter plus case- and whitespace-normalized question."""
+        return f"{cls._scope(document_ids)}\0{' '.join(question.lower().split())}"
+
+    def get_exact(
+        self, question: str, document_ids: list[str] | None
+    ) -> list[dict[str, Any]] | None:
+        """Return cached matches for the same question, if any."""
+        key = self.key(question, document_ids)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] < time.monotonic() - self.ttl_seconds:
+                del self._entries[key]
+                self._matrix = None
+                return None
+            self._entries.move_to_end(key)  # LRU: a hit counts as a use
+            return entry[2]
+
+    def get_similar(
+        self, embedding: list[float], document_ids: list[str] | None
+    ) -> list[dict[str, Any]] | None:
+        """Return cached matches for a near-duplicate question, if any."""
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return None
+
+        scope = self._scope(document_ids)
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries)
+                self._matrix = np.stack([self._entries[k][0] for k in self._matrix_keys])
+            keys = self._matrix_keys
+            scores = self._matrix @ (query / norm)
+            mask = np.fromiter(
+                (self._entries[k][1] == scope for k in keys), dtype=bool, count=len(keys)
+            )
+            scores = np.where(mask, scores, -np.inf)
+
+            best = int(np.argmax(scores))
+            if scores[best] < self.min_similarity:
+                return None
+            self._entries.move_to_end(keys[best])  # LRU: a hit counts as a use
+            return self._entries[keys[best]][2]
+
+    def put(
+        self,
+        question: str,
+        document_ids: list[str] | None,
+        embedding: list[float],
+        matches: list[dict[str, Any]],
+    ) -> None:
+        """Remember the matches retrieved for a question."""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return
+
+        key = self.key(question, document_ids)
+        with self._lock:
+            self._entries[key] = (vec / norm, self._scope(document_ids), matches, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def forget_document(self, document_id: str) -> None:
+        """Drop cached results that include chunks of a document."""
+        with self._lock:
+            stale = [
+                k
+                for k, (_, _, matches, _) in self._entries.items()
+                if any(m["document_id"] == document_id for m in matches)
+            ]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._matrix = None
+
+    def clear(self) -> None:
+        """Drop everything (e.g. after new chunks were stored)."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [k for k, (_, _, _, added_at) in self._entries.items() if added_at < cutoff]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+
+query_cache = QueryCache(
+    max_entries=config.QUERY_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.QUERY_CACHE_TTL_SECONDS,
+    min_similarity=config.QUERY_CACHE_MIN_SIMILARITY,
+)
 
 
 # =============================================================================
@@ -479,17 +1353,33 @@ async def generate_embeddings_batch(texts: list[str]) -> list[list[float]]:
 # =============================================================================
 
 
-def store_chunks(chunks: list[dict[str, Any]]) -> None:
-    """Store document chunks in Pinecone vector database."""
+async def store_chunks(chunks: list[dict[str, Any]]) -> None:
+    """Store document chunks in Pinecone vector database.
+
+    Batches are upserted concurrently (one worker thread each) so their network
+    round trips overlap instead of running back to back. This deliberately avoids
+    the client's async_req: its multiprocessing ThreadPool needs a SemLock, which
+    Lambda (no /dev/shm) can't provide.
+    """
+    import asyncio
+
     index = get_pinecone_index()
 
+    # Upsert requests are capped at 2 MB: 100 x 1024-dim vectors plus chunk text fits
     batch_size = 100
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-        vectors = [
-            {"id": c["id"], "values": c["embedding"], "metadata": c["metadata"]} for c in batch
+    batches = [
+        [
+            # Embeddings stay float32 arrays until they're serialized here
+            {"id": c["id"], "values": c["embedding"].tolist(), "metadata": c["metadata"]}
+            for c in chunks[i : i + batch_size]
         ]
-        index.upsert(vectors=vectors)
+        for i in range(0, len(chunks), batch_size)
+    ]
+    await asyncio.gather(*[asyncio.to_thread(index.upsert, vectors=vectors) for vectors in batches])
+
+    # New chunks may outrank what's cached locally
+    local_vector_cache.clear()
+    query_cache.clear()
 
 
 def query_similar(
@@ -497,7 +1387,19 @@ def query_similar(
     top_k: int | None = None,
     document_ids: list[str] | None = None,
 ) -> list[dict[str, Any]]:
-    """Query Pinecone for similar document chunks."""
+    """Query Pinecone for similar document chunks.
+
+    With LOCAL_VECTOR_CACHE_ENABLED, confident matches are served from
+    local_vector_cache without a Pinecone round trip.
+    """
+    top_k = top_k or config.RETRIEVAL_TOP_K
+    use_local_cache = config.LOCAL_VECTOR_CACHE_ENABLED
+
+    if use_local_cache:
+        cached = local_vector_cache.search(embedding, top_k, document_ids)
+        if cached is not None:
+            return cached
+
     index = get_pinecone_index()
 
     query_filter = None
@@ -506,12 +1408,13 @@ def query_similar(
 
     results = index.query(
         vector=embedding,
-        top_k=top_k or config.RETRIEVAL_TOP_K,
+        top_k=top_k,
         include_metadata=True,
+        include_values=use_local_cache,  # feeds local_vector_cache
         filter=query_filter,
     )
 
-    return [
+    matches = [
         {
             "id": m.id,
             "score": m.score,
@@ -522,18 +1425,84 @@ def query_similar(
         }
         for m in results.matches
     ]
+    if use_local_cache:
+        local_vector_cache.add(matches, [m.values for m in results.matches])
+    return matches
 
 
 def delete_document(document_id: str) -> None:
     """Delete all chunks for a document from Pinecone."""
     index = get_pinecone_index()
     index.delete(filter={"document_id": {"$eq": document_id}})
+    index.delete(ids=[document_id], namespace=config.DOCUMENT_REGISTRY_NAMESPACE)
+    local_vector_cache.forget_document(document_id)
+    query_cache.forget_document(document_id)
 
 
-def list_documents() -> list[dict[str, Any]]:
+def register_documents(documents: list[dict[str, Any]]) -> None:
+    """Record documents (as returned by list_documents) in the document registry."""
+    if not documents:
+        return
+
+    index = get_pinecone_index()
+
+    # Registry records are never queried, but Pinecone rejects all-zero dense vectors
+    placeholder = [1.0] + [0.0] * (config.EMBEDDING_DIMENSIONS - 1)
+    index.upsert(
+        vectors=[
+            {
+                "id": doc["id"],
+                "values": placeholder,
+                "metadata": {
+                    "filename": doc["filename"],
+                    "total_chunks": doc["chunks"],
+                    "uploaded_at": doc["uploaded_at"],
+                },
+            }
+            for doc in documents
+        ],
+        namespace=config.DOCUMENT_REGISTRY_NAMESPACE,
+    )
+
+
+def _list_registered_documents() -> list[dict[str, Any]]:
+    """Read every record of the document registry namespace (list + fetch by id).
+
+    Each page of ids is fetched on a worker thread as soon as it's listed, so fetches
+    overlap with paging through the rest of the namespace. (Not async_req: the
+    client's multiprocessing ThreadPool needs a SemLock, which Lambda lacks.)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    index = get_pinecone_index()
+    namespace = config.DOCUMENT_REGISTRY_NAMESPACE
+
+    documents: list[dict[str, Any]] = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pages = pool.map(
+            lambda ids: index.fetch(ids=ids, namespace=namespace),
+            index.list(namespace=namespace),
+        )
+        for fetched in pages:
+            for vec in fetched.vectors.values():
+                md = vec.metadata or {}
+                documents.append(
+                    {
+                        "id": vec.id,
+                        "filename": md.get("filename"),
+                        "chunks": int(md.get("total_chunks", 1)),
+                        "uploaded_at": md.get("uploaded_at", ""),
+                    }
+                )
+
+    return documents
+
+
+def _list_documents_from_chunks() -> list[dict[str, Any]]:
     """Best-effort listing using the 'is_first_chunk' marker.
 
-    NOTE: This depends on Pinecone supporting metadata filtering.
+    NOTE: This depends on Pinecone supporting metadata filtering, and is capped
+    at 100 documents. Only used to backfill the document registry.
     """
     index = get_pinecone_index()
 
@@ -553,7 +1522,7 @@ def list_documents() -> list[dict[str, Any]]:
             {
                 "id": md.get("document_id"),
                 "filename": md.get("filename"),
-                "chunks": md.get("total_chunks", 1),
+                "chunks": int(md.get("total_chunks", 1)),
                 "uploaded_at": md.get("uploaded_at", ""),
             }
         )
@@ -561,23 +1530,35 @@ def list_documents() -> list[dict[str, Any]]:
     return documents
 
 
+def list_documents() -> list[dict[str, Any]]:
+    """List uploaded documents, newest first, from the document registry.
+
+    The registry namespace holds one record per document, so listing is an
+    exhaustive id scan rather than an ANN query over all chunks. Indexes that
+    predate the registry are backfilled from the first-chunk markers.
+    """
+    documents = _list_registered_documents()
+    if not documents:
+        documents = _list_documents_from_chunks()
+        register_documents(documents)
+
+    documents.sort(key=lambda d: d["uploaded_at"], reverse=True)
+    return documents
+
+
 # =============================================================================
 # RAG Pipeline
 # =============================================================================
 
 
-def generate_answer(
+def _build_chat_messages(
     question: str,
     context: str,
-    history: list[dict[str, Any]] | None = None,
-    chat_model: str | None = None,
-    system_prompt: str | None = None,
-) -> str:
-    """Generate an answer using OpenAI's chat completion API."""
-    client = get_openai()
-
+    history: list[ChatMessage] | None,
+    system_prompt: str | None,
+) -> list[ChatCompletionMessageParam]:
+    """Assemble the system prompt, retrieved context, history and question."""
     prompt = system_prompt or "You are a helpful AI assistant."
-    model = chat_model or config.CHAT_MODEL
 
     # Build messages list with proper typing
     messages: list[dict[str, str]] = [{"role": "system", "content": prompt}]
@@ -606,29 +1587,74 @@ def generate_answer(
 
     # Include full history - OpenAI API handles token limits gracefully
     # by truncating from the beginning if needed
+    # Roles are already validated by ChatMessage
     if history:
-        for msg in history:
-            role = str(msg["role"])
-            content = str(msg["content"])
-            if role in ("user", "assistant", "system"):
-                messages.append({"role": role, "content": content})
+        messages.extend({"role": msg.role, "content": msg.content} for msg in history)
 
     messages.append({"role": "user", "content": question})
 
     # Cast to the proper type for OpenAI API
+    return cast("list[ChatCompletionMessageParam]", messages)
+
+
+def generate_answer(
+    question: str,
+    context: str,
+    history: list[ChatMessage] | None = None,
+    chat_model: str | None = None,
+    system_prompt: str | None = None,
+) -> str:
+    """Generate an answer using OpenAI's chat completion API."""
+    client = get_openai()
+
     response = client.chat.completions.create(
-        model=model,
-        messages=cast("list[ChatCompletionMessageParam]", messages),
+        model=chat_model or config.CHAT_MODEL,
+        messages=_build_chat_messages(question, context, history, system_prompt),
         temperature=0.7,
         max_tokens=1000,
     )
     return response.choices[0].message.content or ""
 
 
+async def stream_answer(
+    question: str,
+    context: str,
+    history: list[ChatMessage] | None = None,
+    chat_model: str | None = None,
+    system_prompt: str | None = None,
+) -> AsyncIterator[str]:
+    """Like generate_answer, but yield the answer's text as the model produces it."""
+    client = get_async_openai()
+
+    stream = await client.chat.completions.create(
+        model=chat_model or config.CHAT_MODEL,
+        messages=_build_chat_messages(question, context, history, system_prompt),
+        temperature=0.7,
+        max_tokens=1000,
+        stream=True,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
 # =============================================================================
 # API Models
 # =============================================================================
 
+# Strict models validate entirely in pydantic-core (no lax coercion paths);
+# unknown fields sent by the frontend are ignored.
+_API_MODEL_CONFIG = ConfigDict(extra="ignore", strict=True, validate_assignment=False)
+
+
+class ChatMessage(BaseModel):
+    """A previous turn of the conversation."""
+
+    model_config = _API_MODEL_CONFIG
+
+    role: Literal["user", "assistant", "system"]
+    content: str
+
 
 class ChatSettings(BaseModel):
     """Settings for chat completion and RAG retrieval.
@@ -638,6 +1664,8 @@ class ChatSettings(BaseModel):
     the best config.CONTEXT_MAX_CHUNKS to the LLM.
     """
 
+    model_config = _API_MODEL_CONFIG
+
     chat_model: str = "gpt-4o-mini"
     top_k: int = 15  # Kept for backwards compatibility
     min_score: float = 0.3
@@ -647,8 +1675,10 @@ class ChatSettings(BaseModel):
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
 
+    model_config = _API_MODEL_CONFIG
+
     message: str
-    history: list[dict[str, Any]] | None = None
+    history: list[ChatMessage] | None = None
     settings: ChatSettings | None = None
     document_ids: list[str] | None = None
 
@@ -656,6 +1686,8 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
 
+    model_config = _API_MODEL_CONFIG
+
     answer: str
     sources: list[dict[str, Any]]
 
@@ -665,40 +1697,73 @@ class ChatResponse(BaseModel):
 # =============================================================================
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest) -> ChatResponse:
-    """Chat endpoint - answer questions using RAG retrieval."""
-    try:
-        settings = request.settings or ChatSettings()
+async def _retrieve_context(
+    request: ChatRequest, settings: ChatSettings
+) -> tuple[str, list[dict[str, Any]]]:
+    """Retrieve the chunks to answer a chat request with.
 
-        query_embedding = generate_embedding(request.message)
+    Returns the LLM context string and the sources (the chunks actually used).
+    """
+    # Repeated and near-duplicate questions reuse earlier retrieval results
+    similar = query_cache.get_exact(request.message, request.document_ids)
+    if similar is None:
+        query_embedding = await generate_embedding(request.message)
+        similar = query_cache.get_similar(query_embedding, request.document_ids)
+        if similar is None:
+            # Retrieve more candidates than we'll use
+            similar = query_similar(
+                query_embedding,
+                top_k=config.RETRIEVAL_TOP_K,
+                document_ids=request.document_ids,
+            )
+        # Only the best few matches can end up in the context, so don't cache the rest
+        usable = max(3, config.CONTEXT_MAX_CHUNKS)
+        query_cache.put(request.message, request.document_ids, query_embedding, similar[:usable])
 
-        # Retrieve more candidates than we'll use
-        similar = query_similar(
-            query_embedding,
-            top_k=config.RETRIEVAL_TOP_K,
-            document_ids=request.document_ids,
+    # Filter by minimum score in one vectorized pass (matches are sorted by score)
+    scores = np.fromiter(
+        (c.get("score", 0.0) for c in similar), dtype=np.float64, count=len(similar)
+    )
+    keep = np.flatnonzero(scores >= settings.min_score)[: config.CONTEXT_MAX_CHUNKS]
+
+    # If we have results, limit to best N for context
+    if keep.size:
+        context_chunks = [similar[i] for i in keep]
+    elif similar:
+        # Fallback: if min_score filtered everything, use top results anyway
+        context_chunks = similar[: max(3, config.CONTEXT_MAX_CHUNKS // 2)]
+    else:
+        context_chunks = []
+
+    # Build context
+    if context_chunks:
+        context = "\n\n---\n\n".join(
+            [f"[Source: {c['filename']}]\n{c['text']}" for c in context_chunks]
         )
+    else:
+        context = ""
 
-        # Filter by minimum score
-        relevant = [c for c in similar if float(c.get("score", 0.0)) >= settings.min_score]
+    # Return sources from context_chunks (what was actually used)
+    sources = [
+        {
+            "text": c["text"],
+            "score": c["score"],
+            "filename": c["filename"],
+            "document_id": c["document_id"],
+            "metadata": c.get("metadata", {}),
+        }
+        for c in context_chunks
+    ]
 
-        # If we have results, limit to best N for context
-        if relevant:
-            context_chunks = relevant[: config.CONTEXT_MAX_CHUNKS]
-        elif similar:
-            # Fallback: if min_score filtered everything, use top results anyway
-            context_chunks = similar[: max(3, config.CONTEXT_MAX_CHUNKS // 2)]
-        else:
-            context_chunks = []
+    return context, sources
 
-        # Build context
-        if context_chunks:
-            context = "\n\n---\n\n".join(
-                [f"[Source: {c['filename']}]\n{c['text']}" for c in context_chunks]
-            )
-        else:
-            context = ""
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest) -> ChatResponse:
+    """Chat endpoint - answer questions using RAG retrieval."""
+    try:
+        settings = request.settings or ChatSettings()
+        context, sources = await _retrieve_context(request, settings)
 
         answer = generate_answer(
             request.message,
@@ -708,18 +1773,6 @@ async def chat(request: ChatRequest) -> ChatResponse:
             system_prompt=settings.system_prompt,
         )
 
-        # Return sources from context_chunks (what was actually used)
-        sources = [
-            {
-                "text": c["text"],
-                "score": c["score"],
-                "filename": c["filename"],
-                "document_id": c["document_id"],
-                "metadata": c.get("metadata", {}),
-            }
-            for c in context_chunks
-        ]
-
         return ChatResponse(answer=answer, sources=sources)
 
     except HTTPException:
@@ -728,20 +1781,117 @@ async def chat(request: ChatRequest) -> ChatResponse:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Streaming chat endpoint (server-sent events).
+
+    Emits {"token": ...} events as the answer is generated, then one
+    {"sources": [...]} event. A failure mid-answer is sent as an {"error": ...} event.
+    """
+    try:
+        settings = request.settings or ChatSettings()
+        context, sources = await _retrieve_context(request, settings)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    def sse(payload: dict[str, Any]) -> bytes:
+        return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for token in stream_answer(
+                request.message,
+                context,
+                request.history,
+                chat_model=settings.chat_model,
+                system_prompt=settings.system_prompt,
+            ):
+                yield sse({"token": token})
+        except Exception as e:
+            yield sse({"error": str(e)})
+            return
+        yield sse({"sources": sources})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 class _FileObj:
     """Lightweight file-like object compatible with extract_structured_chunks."""
 
-    def __init__(self, content: bytes, filename: str) -> None:
-        self.file = io.BytesIO(content)
+    def __init__(self, fileobj: IO[bytes], filename: str) -> None:
+        self.file = fileobj
         self.filename = filename
         self.content_type = "application/octet-stream"
 
 
-def _make_file_obj(content: bytes, filename: str) -> _FileObj:
-    return _FileObj(content, filename)
+def _make_file_obj(fileobj: IO[bytes], filename: str) -> _FileObj:
+    return _FileObj(fileobj, filename)
+
+
+async def _stream_download(client: httpx.AsyncClient, url: str, fileobj: IO[bytes]) -> None:
+    """Stream a URL's body into fileobj without holding it in memory."""
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            fileobj.write(chunk)
+
+
+async def _download_parts(client: httpx.AsyncClient, urls: list[str], fileobj: IO[bytes]) -> int:
+    """Download parts concurrently, writing each directly at its offset in fileobj.
+
+    Part sizes come from HEAD requests, so the file is pre-sized once and every
+    part is streamed into place with os.pwrite (no per-part buffers, no join).
+    Falls back to sequential appends if a size is unknown or a HEAD request fails.
+    Returns the total size.
+    """
+    import asyncio
+
+    import httpx
+
+    semaphore = asyncio.Semaphore(config.DOWNLOAD_MAX_CONCURRENCY)
+    # Content-Length must match the bytes written, so ask for the parts unencoded
+    # (aiter_bytes() would otherwise yield more bytes than the HEAD reported)
+    identity = {"Accept-Encoding": "identity"}
+
+    async def head_size(url: str) -> int | None:
+        # A failed HEAD only means the size is unknown; the GET reports real errors
+        try:
+            async with semaphore:
+                response = await client.head(url, headers=identity)
+        except httpx.HTTPError:
+            return None
+        length = response.headers.get("content-length")
+        if not response.is_success or length is None:
+            return None
+        return int(length)
+
+    sizes = await asyncio.gather(*[head_size(url) for url in urls])
+    if any(size is None for size in sizes):
+        for url in urls:
+            await _stream_download(client, url, fileobj)
+        return fileobj.tell()
+
+    offsets = list(itertools.accumulate(cast("list[int]", sizes), initial=0))
+    fd = fileobj.fileno()
+    os.ftruncate(fd, offsets[-1])
+
+    async def fetch(url: str, start: int, end: int) -> None:
+        offset = start
+        async with semaphore, client.stream("GET", url, headers=identity) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+        if offset != end:
+            raise ValueError(f"Part {url} was {offset - start} bytes, expected {end - start}")
 
+    await asyncio.gather(*[fetch(url, offsets[i], offsets[i + 1]) for i, url in enumerate(urls)])
+    return offsets[-1]
 
-async def _process_file(file_obj: Any, display_filename: str) -> dict[str, Any]:
+
+async def _process_file(
+    file_obj: Any, display_filename: str, document_id: str | None = None
+) -> dict[str, Any]:
     """Shared file processing: extract chunks, generate embeddings, store in Pinecone."""
     if not config.OPENAI_API_KEY:
         raise HTTPException(
@@ -768,7 +1918,7 @@ async def _process_file(file_obj: Any, display_filename: str) -> dict[str, Any]:
     chunk_texts = [chunk["text"] for chunk in structured_chunks]
     embeddings = await generate_embeddings_batch(chunk_texts)
 
-    document_id = generate_document_id()
+    document_id = document_id or generate_document_id()
     uploaded_at = datetime.now(timezone.utc).isoformat()
 
     chunks: list[dict[str, Any]] = []
@@ -789,7 +1939,17 @@ async def _process_file(file_obj: Any, display_filename: str) -> dict[str, Any]:
             },
         })
 
-    store_chunks(chunks)
+    await store_chunks(chunks)
+    register_documents(
+        [
+            {
+                "id": document_id,
+                "filename": display_filename,
+                "chunks": len(structured_chunks),
+                "uploaded_at": uploaded_at,
+            }
+        ]
+    )
 
     return {
         "success": True,
@@ -799,15 +1959,74 @@ async def _process_file(file_obj: Any, display_filename: str) -> dict[str, Any]:
     }
 
 
+# Outcome of background uploads still running or failed on this instance
+# document_id -> (job state, time set), oldest first
+_upload_jobs: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+
+
+def _set_upload_job(document_id: str, job: dict[str, Any]) -> None:
+    """Record a background upload's state and drop entries past UPLOAD_JOB_TTL_SECONDS."""
+    now = time.monotonic()
+    _upload_jobs[document_id] = (job, now)
+    _upload_jobs.move_to_end(document_id)
+    while _upload_jobs:
+        key, (_, set_at) = next(iter(_upload_jobs.items()))
+        if set_at >= now - config.UPLOAD_JOB_TTL_SECONDS:
+            break
+        del _upload_jobs[key]
+
+
+async def _process_upload_job(
+    path: str, filename: str, display_filename: str, document_id: str
+) -> None:
+    """Process an upload spooled to path, recording the outcome in _upload_jobs."""
+    try:
+        with open(path, "rb") as f:
+            await _process_file(_make_file_obj(f, filename), display_filename, document_id)
+        # The document registry answers status queries from here on
+        _upload_jobs.pop(document_id, None)
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"[upload] Background processing of {display_filename} failed: {detail}")
+        _set_upload_job(document_id, {"status": "failed", "error": str(detail)})
+    finally:
+        os.unlink(path)
+
+
 @app.post("/upload")
 async def upload(
     file: Annotated[UploadFile, File()],
+    background_tasks: BackgroundTasks,
     filename: Annotated[str | None, Form()] = None,
+    background: Annotated[bool, Form()] = False,
 ) -> dict[str, Any]:
-    """Upload and process a document file."""
+    """Upload and process a document file.
+
+    With background=true the upload is spooled to disk and acknowledged right away
+    with status "processing"; poll /documents/{document_id}/status for the outcome.
+    """
     try:
         display_filename = filename or file.filename or "unknown"
-        return await _process_file(file, display_filename)
+        if not background:
+            return await _process_file(file, display_filename)
+
+        source_name = file.filename or display_filename
+        with tempfile.NamedTemporaryFile(
+            suffix=os.path.splitext(source_name)[1], delete=False
+        ) as tmp:
+            shutil.copyfileobj(file.file, tmp)
+
+        document_id = generate_document_id()
+        _set_upload_job(document_id, {"status": "processing"})
+        background_tasks.add_task(
+            _process_upload_job, tmp.name, source_name, display_filename, document_id
+        )
+        return {
+            "success": True,
+            "document_id": document_id,
+            "filename": display_filename,
+            "status": "processing",
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -826,6 +2045,25 @@ async def get_documents() -> dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@app.get("/documents/{document_id}/status")
+async def get_document_status(document_id: str) -> dict[str, Any]:
+    """Report whether a (background) upload is processing, ready, failed or unknown."""
+    entry = _upload_jobs.get(document_id)
+    if entry is not None and entry[1] >= time.monotonic() - config.UPLOAD_JOB_TTL_SECONDS:
+        return {"document_id": document_id, **entry[0]}
+
+    try:
+        # Documents are registered only after all of their chunks are stored
+        fetched = get_pinecone_index().fetch(
+            ids=[document_id], namespace=config.DOCUMENT_REGISTRY_NAMESPACE
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    status = "ready" if document_id in fetched.vectors else "not_found"
+    return {"document_id": document_id, "status": status}
+
+
 @app.delete("/documents/{document_id}")
 async def remove_document(document_id: str) -> dict[str, bool]:
     """Delete a document and all its chunks."""
@@ -846,15 +2084,14 @@ async def upload_from_url(request: dict[str, Any]) -> dict[str, Any]:
         if not url or not filename:
             raise HTTPException(status_code=400, detail="Missing url or filename")
 
-        import httpx
-
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            content = response.content
+        # Stream to disk: extractors read from the file (PDFs by path) instead of a bytes copy
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1]) as tmp:
+            await _stream_download(get_download_client(), url, tmp)
+            tmp.flush()
+            tmp.seek(0)
 
-        fake_file = _make_file_obj(content, filename)
-        return await _process_file(fake_file, filename)
+            fake_file = _make_file_obj(tmp, filename)
+            return await _process_file(fake_file, filename)
 
     except HTTPException:
         raise
@@ -869,8 +2106,8 @@ async def upload_from_urls(request: dict[str, Any]) -> dict[str, Any]:
     """Download file parts from multiple blob URLs, concatenate, and process.
 
     Used by the chunked upload flow: each part was uploaded as an individual
-    small blob. This endpoint downloads them all in parallel, concatenates
-    in order, and processes the assembled file.
+    small blob. This endpoint downloads them in parallel (bounded), writes each
+    at its offset in one temp file, and processes the assembled file.
     """
     try:
         urls: list[str] = request.get("urls", [])
@@ -879,21 +2116,16 @@ async def upload_from_urls(request: dict[str, Any]) -> dict[str, Any]:
         if not urls or not filename:
             raise HTTPException(status_code=400, detail="Missing urls or filename")
 
-        import asyncio
-
-        import httpx
-
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            responses = await asyncio.gather(
-                *[client.get(url) for url in urls]
-            )
+        with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1]) as tmp:
+            # urls are already sorted by the caller
+            size = await _download_parts(get_download_client(), urls, tmp)
 
-        # Concatenate parts in order (urls are already sorted by the caller)
-        content = b"".join(r.content for r in responses)
-        print(f"[upload-from-urls] Downloaded {len(urls)} parts ({len(content) / 1024 / 1024:.2f} MB)")
+            print(f"[upload-from-urls] Downloaded {len(urls)} parts ({size / 1024 / 1024:.2f} MB)")
+            tmp.flush()
+            tmp.seek(0)
 
-        fake_file = _make_file_obj(content, filename)
-        return await _process_file(fake_file, filename)
+            fake_file = _make_file_obj(tmp, filename)
+            return await _process_file(fake_file, filename)
 
     except HTTPException:
         raise
@@ -0,0 +1,99 @@
+"""Behavior tests for token-based chunking."""
+
+import itertools
+
+import pytest
+import tiktoken
+
+from serverless.backend import index
+
+# Byte-level encoding (one token per UTF-8 byte) so the tests don't need to download
+# a BPE vocabulary; multi-byte characters still span several tokens.
+_BYTE_ENCODING = tiktoken.Encoding(
+    name="bytes",
+    pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+    mergeable_ranks={bytes([i]): i for i in range(256)},
+    special_tokens={"<|endoftext|>": 256},
+)
+
+
+@pytest.fixture(autouse=True)
+def byte_encoder(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Chunk with the byte-level encoding instead of the model's."""
+    monkeypatch.setattr(index, "_get_encoder", lambda model=None: _BYTE_ENCODING)
+
+
+def _tokens(text: str) -> int:
+    return len(_BYTE_ENCODING.encode_ordinary(text))
+
+
+def _sentences(n: int, words: int) -> str:
+    return " ".join(f"Sentence {i} " + "word " * words + "end." for i in range(n))
+
+
+def test_short_text_is_one_chunk() -> None:
+    """Text within the budget comes back whole."""
+    assert index.chunk_by_tokens("  One sentence. Two.\r\n", 800, 150) == ["One sentence. Two."]
+
+
+def test_overlap_must_be_smaller_than_chunk() -> None:
+    """An overlap as large as the chunk could never make progress."""
+    with pytest.raises(ValueError):
+        index.chunk_by_tokens("text", 100, 100)
+
+
+def test_chunks_respect_the_token_bound() -> None:
+    """No chunk encodes to more than chunk_tokens."""
+    text = _sentences(200, 8)
+    chunks = index.chunk_by_tokens(text, 200, 50)
+
+    assert len(chunks) > 1
+    assert max(_tokens(c) for c in chunks) <= 200
+
+
+def test_multibyte_text_respects_the_token_bound() -> None:
+    """Characters split across token spans don't push a chunk over the bound."""
+    chunks = index.chunk_by_tokens("経営戦略" * 2000, 800, 150)
+
+    assert len(chunks) > 1
+    assert max(_tokens(c) for c in chunks) <= 800
+    assert chunks[0].startswith("経営戦略")
+
+
+def test_consecutive_chunks_overlap() -> None:
+    """Each chunk starts with whole sentences from the end of the previous one."""
+    chunks = index.chunk_by_tokens(_sentences(100, 3), 150, 40)
+
+    assert len(chunks) > 2
+    for prev, nxt in itertools.pairwise(chunks):
+        first_sentence = nxt.split("end.")[0] + "end."
+        assert first_sentence in prev
+        assert nxt not in prev
+
+
+def test_progress_when_spans_exceed_the_overlap() -> None:
+    """Sentences longer than overlap_tokens still move forward, one chunk per span."""
+    text = _sentences(10, 30)  # ~170 tokens per sentence
+    chunks = index.chunk_by_tokens(text, 200, 20)
+
+    assert len(chunks) == 10
+    assert [c.split()[1] for c in chunks] == [str(i) for i in range(10)]
+
+
+def test_oversized_segment_without_boundaries_is_split() -> None:
+    """A run with no sentence or line breaks is cut at token boundaries."""
+    text = "x" * 5000
+    chunks = index.chunk_by_tokens(text, 800, 100)
+
+    assert max(_tokens(c) for c in chunks) <= 800
+    assert sum(len(c) for c in chunks) >= len(text)
+    assert chunks[-1].endswith("x")
+
+
+def test_special_token_text_is_chunked_as_plain_text() -> None:
+    """A literal <|endoftext|> in a document is ordinary text, not an error."""
+    text = _sentences(30, 5) + " Model output <|endoftext|> appears here."
+    chunks = index.chunk_by_tokens(text, 120, 20)
+
+    assert "<|endoftext|>" in chunks[-1]
+    assert max(_tokens(c) for c in chunks) <= 120
@@ -0,0 +1,77 @@
+"""Error-path tests for the query embedding micro-batcher."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from serverless.backend import index
+
+
+class FakeEmbeddings:
+    """Stands in for AsyncOpenAI.embeddings; rejects any input containing "bad"."""
+
+    def __init__(self) -> None:
+        """Start with no recorded requests."""
+        self.inputs: list[str | list[str]] = []
+
+    async def create(self, model: str, input: str | list[str], dimensions: int) -> Any:
+        """Embed each text as [len(text)], or fail the whole request."""
+        self.inputs.append(input)
+        texts = [input] if isinstance(input, str) else input
+        if any("bad" in text for text in texts):
+            raise ValueError("invalid input")
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(texts)]
+        )
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch: pytest.MonkeyPatch) -> FakeEmbeddings:
+    """Route the batcher to a fake batch-capable client."""
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(index, "get_async_openai", lambda: SimpleNamespace(embeddings=embeddings))
+    monkeypatch.setattr(index, "_supports_batch_embeddings", lambda: True)
+    return embeddings
+
+
+async def _submit_all(batcher: index.EmbeddingBatcher, texts: list[str]) -> list[Any]:
+    return await asyncio.wait_for(
+        asyncio.gather(*[batcher.submit(text) for text in texts], return_exceptions=True),
+        timeout=2,
+    )
+
+
+def test_missing_api_key_fails_instead_of_hanging(monkeypatch: pytest.MonkeyPatch) -> None:
+    """A client that can't be created must fail every waiting caller."""
+    monkeypatch.setattr(type(index.config), "OPENAI_API_KEY", None)
+    monkeypatch.setattr(index, "_async_openai_client", None)
+    batcher = index.EmbeddingBatcher(max_batch_size=8, max_wait_ms=1)
+
+    results = asyncio.run(_submit_all(batcher, ["a", "b"]))
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_bad_text_only_fails_its_own_caller(fake_embeddings: FakeEmbeddings) -> None:
+    """A rejected batch falls back to per-text requests."""
+    batcher = index.EmbeddingBatcher(max_batch_size=8, max_wait_ms=1)
+
+    ok, bad, other = asyncio.run(_submit_all(batcher, ["ok", "bad text", "other"]))
+
+    assert ok == [2.0]
+    assert isinstance(bad, ValueError)
+    assert other == [5.0]
+    assert fake_embeddings.inputs[0] == ["ok", "bad text", "other"]
+    assert sorted(map(str, fake_embeddings.inputs[1:])) == ["bad text", "ok", "other"]
+
+
+def test_duplicate_texts_share_one_vector(fake_embeddings: FakeEmbeddings) -> None:
+    """Coalesced duplicates are embedded once and each caller gets the vector."""
+    batcher = index.EmbeddingBatcher(max_batch_size=8, max_wait_ms=1)
+
+    results = asyncio.run(_submit_all(batcher, ["same", "same"]))
+
+    assert results == [[4.0], [4.0]]
+    assert fake_embeddings.inputs == ["same"]